@@ -1,31 +1,44 @@
 import threading
 import logging
-from omegaconf import DictConfig
+from omegaconf import OmegaConf
+from OpenFAIR.utils import parse_vehicle_entry
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
 
 class ConsumerManager:
 
     def __init__(self, cfg, consumers, CONSUMER_COMMAND="python consume.py"):
         self.consumers = consumers
+        # Resolve container IPs once instead of walking container.attrs on every start/stop
+        self.consumer_ips = {name: container.attrs.get('NetworkSettings', {}).get('IPAddress')
+                             for name, container in consumers.items()}
         self.threads = {}
         self.consumer_command = CONSUMER_COMMAND
         self.logger = logging.getLogger("CONSUMER_MANAGER")
         self.cfg = cfg
         self.logging_level = cfg.logging_level.upper()
         self.logger.setLevel(self.logging_level)
-        self.default_consumer_config = dict(cfg.default_consumer_config)
+
+        # Pooled HTTP session: keep-alive connections are reused across /health, /configure and /start
+        self.http = requests.Session()
+        # Do not use environment proxies (prevents corporate proxy from intercepting 172.* calls)
+        self.http.trust_env = False
+        adapter = HTTPAdapter(pool_connections=64, pool_maxsize=64, max_retries=Retry(total=0))
+        self.http.mount("http://", adapter)
+
+        self.default_consumer_config = OmegaConf.to_container(cfg.default_consumer_config, resolve=True)
         self.default_consumer_config["kafka_topic_update_interval_secs"] = cfg.kafka_topic_update_interval_secs
         self.consumer_configs = {}
         self.override = cfg.override
         for vehicle in cfg.vehicles:
-            if type(vehicle) == str:
-                vehicle_name = vehicle
-            else:
-                vehicle_name = list(vehicle.keys())[0]
-            self.consumer_configs[vehicle_name] = self.default_consumer_config.copy()
-            if type(vehicle) == DictConfig:
-                self.consumer_configs[vehicle_name].update(vehicle[vehicle_name])
+            vehicle_name, consumer_config = parse_vehicle_entry(vehicle, self.default_consumer_config)
+            self.consumer_configs[vehicle_name] = consumer_config
             if self.consumer_configs[vehicle_name]["anomaly_classes"] == "all":
                 self.consumer_configs[vehicle_name]["anomaly_classes"] = list(range(1, 19))
             if self.consumer_configs[vehicle_name]["diagnostics_classes"] == "all":
@@ -33,9 +46,13 @@ class ConsumerManager:
 
 
     def start_all_consumers(self):
-        results = []
-        for consumer_name, consumer in self.consumers.items():
-            results.append(self.start_consumer(consumer_name, consumer))
+        if not self.consumers:
+            return "All consumers started!", []
+        # Each start is dominated by health polling and REST calls, so run them concurrently
+        with ThreadPoolExecutor(max_workers=len(self.consumers)) as pool:
+            futures = {pool.submit(self.start_consumer, consumer_name, consumer): consumer_name
+                       for consumer_name, consumer in self.consumers.items()}
+            results = [future.result() for future in as_completed(futures)]
         return "All consumers started!", results
     
 
@@ -44,24 +61,25 @@ class ConsumerManager:
             vehicle_name = consumer_name.split("_")[0]
             consumer_config = self.consumer_configs[vehicle_name]
 
-            container_ip = consumer_container.attrs['NetworkSettings']['IPAddress']
+            container_ip = self.consumer_ips.get(consumer_name)
             hostname_url = f"http://{consumer_name}:5000"
             ip_url = f"http://{container_ip}:5000"
 
             def wait_for_health(base_url, timeout=60):
-                # Give container a brief moment to bring up the API
-                time.sleep(2)
+                # Poll with exponential backoff so a quickly-ready API is detected early
+                delay = 0.1
                 deadline = time.time() + timeout
                 while time.time() < deadline:
                     try:
-                        r = requests.get(f"{base_url}/health", timeout=5)
+                        r = self.http.get(f"{base_url}/health", timeout=5)
                         if r.ok:
                             data = r.json()
                             if isinstance(data, dict) and ('running' in data or 'configured' in data):
                                 return True
                     except Exception:
                         pass
-                    time.sleep(2)
+                    time.sleep(delay)
+                    delay = min(delay * 1.5, 2.0)
                 return False
 
             api_url = hostname_url if wait_for_health(hostname_url) else (ip_url if wait_for_health(ip_url) else None)
@@ -104,9 +122,9 @@ class ConsumerManager:
             if self.cfg.anomaly_detection.layer_norm:
                 cfg_payload['layer_norm'] = True
 
-            r1 = requests.post(f"{api_url}/configure", json=cfg_payload, timeout=30)
+            r1 = self.http.post(f"{api_url}/configure", data=orjson.dumps(cfg_payload), headers=_JSON_HEADERS, timeout=30)
             r1.raise_for_status()
-            r2 = requests.post(f"{api_url}/start", json={}, timeout=30)
+            r2 = self.http.post(f"{api_url}/start", data=orjson.dumps({}), headers=_JSON_HEADERS, timeout=30)
             r2.raise_for_status()
             self.logger.info(f"Consumer {consumer_name} started successfully")
             return f"Consumer {consumer_name} started successfully"
@@ -117,15 +135,14 @@ class ConsumerManager:
 
 
     def stop_consumer(self, consumer_name):
-        container = self.consumers[consumer_name]
         try:
-            container_ip = container.attrs['NetworkSettings']['IPAddress']
+            container_ip = self.consumer_ips.get(consumer_name)
             hostname_url = f"http://{consumer_name}:5000/stop"
             tried = []
             # Try hostname first
             try:
                 tried.append(hostname_url)
-                r = requests.post(hostname_url, json={}, timeout=20)
+                r = self.http.post(hostname_url, data=orjson.dumps({}), headers=_JSON_HEADERS, timeout=20)
                 r.raise_for_status()
                 self.logger.info(f"Stopped consumer {consumer_name}")
                 return
@@ -136,7 +153,7 @@ class ConsumerManager:
             if container_ip:
                 ip_url = f"http://{container_ip}:5000/stop"
                 tried.append(ip_url)
-                r = requests.post(ip_url, json={}, timeout=20)
+                r = self.http.post(ip_url, data=orjson.dumps({}), headers=_JSON_HEADERS, timeout=20)
                 r.raise_for_status()
                 self.logger.info(f"Stopped consumer {consumer_name}")
                 return
@@ -147,5 +164,10 @@ class ConsumerManager:
 
 
     def stop_all_consumers(self):
-        for consumer_name in self.consumers:
-            self.stop_consumer(consumer_name)
\ No newline at end of file
+        if not self.consumers:
+            return
+        with ThreadPoolExecutor(max_workers=len(self.consumers)) as pool:
+            futures = {pool.submit(self.stop_consumer, consumer_name): consumer_name
+                       for consumer_name in self.consumers}
+            for future in as_completed(futures):
+                future.result()
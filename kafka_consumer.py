@@ -1,7 +1,8 @@
 from confluent_kafka import Consumer, KafkaError
-import time
-import json
+import orjson
+import queue
 import threading
+import time
 
 # Patterns to match different types of Kafka topics
 topics_dict = {
@@ -9,40 +10,51 @@ topics_dict = {
     "normal_data": '^.*_normal_data$', # Topics with normal data
     "statistics" : '^.*_statistics$' # Topics with statistics data
 }
+_TOPIC_PATTERNS_LIST = list(topics_dict.values())  # Passed to subscribe()
+_TOPIC_PATTERNS_SET = set(_TOPIC_PATTERNS_LIST)  # Membership checks in the error path
+_METADATA_TIMEOUT_SECONDS = 10  # Upper bound for list_topics() so a slow broker cannot stall polling
 
 
 class KafkaMessageConsumer:
     def __init__(self, parent, cfg):
         
-        # controls the resubscription thread
+        # controls the consuming and processing threads
         self.is_running = True
-        self.current_topics = set()
+        # Set on stop() to wake up threads waiting between iterations
+        self._stop_event = threading.Event()
+        self.current_topics = frozenset()
         self.parent = parent
         self.retry_delay = 1
 
         configs = {'bootstrap.servers': cfg.dashboard.kafka_broker_url,  # Kafka broker URL
                         'group.id': cfg.dashboard.kafka_consumer_group_id,  # Consumer group for offset management
                         'auto.offset.reset': cfg.dashboard.kafka_auto_offset_reset,  # Start reading messages from the beginning if no offset is present
-                        'allow.auto.create.topics': 'true'  # crucial for topic updating
+                        'allow.auto.create.topics': 'true',  # crucial for topic updating
+                        'queued.max.messages.kbytes': 10000,  # Cap the local prefetch queue (default is ~1 GB)
+                        'queued.min.messages': 2000,  # Prefetched messages kept per partition
+                        'fetch.message.max.bytes': 1048576  # Max bytes fetched per partition per request
                         }
         self.consumer = Consumer(configs)
         self.subscribe()
         self.topic_update()
         self.consuming_thread = threading.Thread(target=self.read_messages)
         self.consuming_thread.daemon = True
+
+        # Bounded hand-off queue so slow message processing does not stall polling
+        self._work_queue = queue.Queue(maxsize=10_000)
+        self.processing_thread = threading.Thread(target=self._process_messages)
+        self.processing_thread.daemon = True
         
-        # Thread for periodic resubscription
+        # Topic updates are scheduled inside the polling loop
         self.resubscribe_interval_seconds = cfg.kafka_topic_update_interval_secs
-        self.resubscription_thread = threading.Thread(target=self._periodic_topic_update)
-        self.resubscription_thread.daemon = True
 
 
     def start(self):
         """
-        Start both reading and resubscription threads
+        Start the reading and processing threads
         """
+        self.processing_thread.start()
         self.consuming_thread.start()
-        self.resubscription_thread.start()
 
 
     def stop(self):
@@ -50,38 +62,58 @@ class KafkaMessageConsumer:
         Gracefully stop the consumer and its threads
         """
         self.is_running = False
-        self.consumer.close()
+        self._stop_event.set()
         
-        # Wait for threads to finish
+        # Wait for threads to finish; read_messages closes the consumer on exit
         self.consuming_thread.join()
-        self.resubscription_thread.join()
+        self.processing_thread.join()
 
 
-    def _periodic_topic_update(self):
+    def _process_messages(self):
         """
-        Periodically Kafka topics update.
+        Hand queued messages over to the parent.
         This method runs in a separate thread.
         """
         while self.is_running:
             try:
-                # Wait for a certain interval before resubscribing
-                time.sleep(self.resubscribe_interval_seconds)
-                self.topic_update()
+                topic, data = self._work_queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            try:
+                self.parent.process_message_routine(topic, data)
             except Exception as e:
-                self.parent.logger.error(f"Error in periodic resubscription: {e}")
+                self.parent.logger.error(f"Error while processing message from {topic}: {e}")
+
+
+    def _enqueue(self, item):
+        """
+        Block until the processing queue has room, so a slow consumer builds Kafka lag
+        instead of dropping messages whose offsets are committed anyway.
+        Gives up only when the consumer is stopping.
+        """
+        while self.is_running:
+            try:
+                self._work_queue.put(item, timeout=1.0)
+                return
+            except queue.Full:
+                continue
 
 
     def subscribe(self):
         try:
-            self.consumer.subscribe(list(topics_dict.values()))
+            self.consumer.subscribe(_TOPIC_PATTERNS_LIST)
         except KafkaError as e:
             self.parent.logger.error(f"Error subscribing to topics: {e}")
             return None
-        self.parent.logger.debug(f"(Re)Started consuming messages from topics: {list(topics_dict.values())}")
+        self.parent.logger.debug(f"(Re)Started consuming messages from topics: {_TOPIC_PATTERNS_LIST}")
         
         
-    def topic_update(self):
-        available_topics = set(self.consumer.list_topics().topics.keys())
+    def topic_update(self, timeout=-1):
+        # timeout=-1 waits for the broker; the polling loop passes a bound so it cannot stall
+        available_topics = frozenset(self.consumer.list_topics(timeout=timeout).topics)
+        # Nothing to do on a stable cluster: skip the diff and the resubscription
+        if available_topics == self.current_topics:
+            return
         new_topics = available_topics - self.current_topics
         self.current_topics = available_topics
         if len(new_topics) > 0:
@@ -91,44 +123,54 @@ class KafkaMessageConsumer:
 
     def deserialize_message(self, msg):
         try:
-            # Decode the message value from bytes to string and parse JSON
-            message_value = json.loads(msg.value().decode('utf-8'))
+            # Parse JSON straight from the message value bytes
+            message_value = orjson.loads(msg.value())
             # self.parent.logger.debug(f"Received message from topic {msg.topic()}")
             return message_value
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             self.parent.logger.error(f"Error deserializing message: {e}")
             return None
     
 
     def read_messages(self):
+        next_topic_update = time.monotonic() + self.resubscribe_interval_seconds
         try:
-            while True:
-                msg = self.consumer.poll(1.0)  # Poll for new messages with a timeout of 1 second
-                if msg is None:
-                    continue
-                if msg.error():
-                    if msg.error().code() == KafkaError._PARTITION_EOF:
-                        self.parent.logger.info(f"End of partition reached: {msg.error()}")
-                    elif (msg.error().code() == KafkaError.UNKNOWN_TOPIC_OR_PART) and \
-                        (msg.error().str().split(': ')[1] in list(topics_dict.values())):
-                            self.parent.logger.info(f"No avilable vehicles yet. Please create some vehicles...")
-                    else:
-                        self.parent.logger.error(f"Consumer error: {msg.error()}")
+            while self.is_running:
+                try:
+                    if time.monotonic() >= next_topic_update:
+                        next_topic_update = time.monotonic() + self.resubscribe_interval_seconds
+                        self.topic_update(timeout=_METADATA_TIMEOUT_SECONDS)
+
+                    # Fetch up to a batch of messages per call instead of one poll() per message
+                    msgs = self.consumer.consume(num_messages=500, timeout=1.0)
+                except Exception as e:
+                    self.parent.logger.error(f"Error while reading message: {e}")
+                    self.parent.logger.info(f"Retrying in {self.retry_delay} seconds...")
+                    self._stop_event.wait(self.retry_delay)
+                    self.retry_delay = min(self.retry_delay * 2, 60)  # Exponential backoff, max 60 seconds
                     continue
-
-                # Deserialize the message and process it
-                deserialized_data = self.deserialize_message(msg)
-                if deserialized_data:
-                    # self.parent.logger.debug(f"Processing message from topic {msg.topic()}")
-                    self.parent.process_message_routine(msg.topic(), deserialized_data)
-                else:
-                    self.parent.logger.warning("Deserialized message is None")
-
-                retry_delay = 1  # Reset retry delay on success
-        except Exception as e:
-            self.parent.logger.error(f"Error while reading message: {e}")
-            self.parent.logger.info(f"Retrying in {self.retry_delay} seconds...")
-            time.sleep(self.retry_delay)
-            retry_delay = min(self.retry_delay * 2, 60)  # Exponential backoff, max 60 seconds
+                self.retry_delay = 1  # Reset retry delay on success
+
+                for msg in msgs:
+                    # A bad message must not cost the rest of the batch
+                    try:
+                        if msg.error():
+                            if msg.error().code() == KafkaError._PARTITION_EOF:
+                                self.parent.logger.info(f"End of partition reached: {msg.error()}")
+                            elif (msg.error().code() == KafkaError.UNKNOWN_TOPIC_OR_PART) and \
+                                (msg.error().str().split(': ')[1] in _TOPIC_PATTERNS_SET):
+                                    self.parent.logger.info(f"No avilable vehicles yet. Please create some vehicles...")
+                            else:
+                                self.parent.logger.error(f"Consumer error: {msg.error()}")
+                            continue
+
+                        # Deserialize the message and process it
+                        deserialized_data = self.deserialize_message(msg)
+                        if deserialized_data:
+                            self._enqueue((msg.topic(), deserialized_data))
+                        else:
+                            self.parent.logger.warning("Deserialized message is None")
+                    except Exception as e:
+                        self.parent.logger.error(f"Error while handling message from topic {msg.topic()}: {e}")
         finally:
             self.consumer.close()  # Close the Kafka consumer on exit
\ No newline at end of file
@@ -1,10 +1,17 @@
 import docker
 import logging
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 import time
 import yaml
 import os
-from omegaconf import ListConfig, DictConfig, OmegaConf
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from omegaconf import OmegaConf
+from OpenFAIR.utils import parse_vehicle_entry
+
+_LOG = logging.getLogger("PRODUCER_MANAGER")
+_JSON_HEADERS = {"Content-Type": "application/json"}
 
 class ProducerManager:
     def __init__(self, cfg, producers, containers_ips, PRODUCER_COMMAND="python produce.py"):
@@ -15,28 +22,25 @@ class ProducerManager:
         self.logging_level = cfg.logging_level
         self.mode = cfg.mode
         self.manager_port = cfg.container_manager_port
-        self.probe_metrics = cfg.security_manager.probe_metrics
         self.no_proxy_host = cfg.dashboard.proxy
-        self.attack_config = cfg.attack
+        # Static parts of the producer payload are converted once and shared by every producer
+        self._probe_metrics = OmegaConf.to_container(cfg.security_manager.probe_metrics, resolve=True)
+        self._attack_config = OmegaConf.to_container(cfg.attack, resolve=True)
         
         # HTTP session configured to ignore system proxy settings for internal Docker IPs
         self.http = requests.Session()
         # Do not use environment proxies (prevents corporate proxy from intercepting 172.* calls)
         self.http.trust_env = False
+        # Size the connection pool for the concurrent start/stop/status calls
+        adapter = HTTPAdapter(pool_connections=64, pool_maxsize=64)
+        self.http.mount("http://", adapter)
         
         # Initialize vehicle configurations
         self.vehicle_configs = {}
         self.vehicle_names = []
         
         for vehicle in cfg.vehicles:
-            if type(vehicle) == str:
-                vehicle_name = vehicle
-                vehicle_config = cfg.default_vehicle_config.copy()
-            else:
-                vehicle_name = list(vehicle.keys())[0]
-                vehicle_config = cfg.default_vehicle_config.copy()
-                vehicle_config.update(vehicle[vehicle_name])
-            
+            vehicle_name, vehicle_config = parse_vehicle_entry(vehicle, cfg.default_vehicle_config)
             self.vehicle_names.append(vehicle_name)
             self.vehicle_configs[vehicle_name] = vehicle_config
             
@@ -46,28 +50,17 @@ class ProducerManager:
             if vehicle_config.get("diagnostics_classes") == "all":
                 self.vehicle_configs[vehicle_name]["diagnostics_classes"] = list(range(1, 15))
 
-    def _convert_to_json_serializable(self, obj):
-        """Convert OmegaConf objects to JSON serializable Python objects"""
-        if isinstance(obj, (ListConfig, list)):
-            return [self._convert_to_json_serializable(item) for item in obj]
-        elif isinstance(obj, (DictConfig, dict)):
-            return {k: self._convert_to_json_serializable(v) for k, v in obj.items()}
-        elif hasattr(obj, '__dict__'):
-            # Handle other OmegaConf objects by converting to dict first
-            try:
-                return self._convert_to_json_serializable(OmegaConf.to_container(obj))
-            except:
-                return str(obj)
-        else:
-            # Handle primitive types
-            return obj
-
     def start_all_producers(self):
         """Start all producers using HTTP API"""
-        results = []
-        for producer_name, vehicle_name in zip(self.producers.keys(), self.vehicle_names):
-            result = self.start_producer(producer_name, self.producers[producer_name], self.vehicle_configs[vehicle_name])
-            results.append(result)
+        if not self.producers:
+            return "All producers started!", []
+        # Each start is dominated by health polling and REST calls, so run them concurrently
+        with ThreadPoolExecutor(max_workers=len(self.producers)) as pool:
+            futures = {
+                pool.submit(self.start_producer, producer_name, self.producers[producer_name], self.vehicle_configs[vehicle_name]): producer_name
+                for producer_name, vehicle_name in zip(self.producers.keys(), self.vehicle_names)
+            }
+            results = [future.result() for future in as_completed(futures)]
         return "All producers started!", results
 
     def start_producer(self, producer_name, producer_container, vehicle_config):
@@ -91,58 +84,51 @@ class ProducerManager:
                     break
             if not api_url:
                 error_msg = f"Failed to start producer {producer_name}: API not healthy at {hostname_url} or {ip_url}"
-                logging.getLogger("PRODUCER_MANAGER").error(error_msg)
+                _LOG.error(error_msg)
                 return error_msg
             
             
             # Step 1: Configure the producer
             config_data = self._build_config_data(vehicle_config, producer_name.split('_')[0])
             
-            # Test JSON serialization before sending
             try:
-                import json
-                json.dumps(config_data)
+                config_response = self.http.post(
+                    f"{api_url}/configure",
+                    data=orjson.dumps(config_data),
+                    headers=_JSON_HEADERS,
+                    timeout=30
+                )
             except TypeError as e:
                 error_msg = f"JSON serialization failed for {producer_name}: {e}"
-                logging.getLogger("PRODUCER_MANAGER").error(error_msg)
+                _LOG.error(error_msg)
                 # Log the problematic data structure
-                logging.getLogger("PRODUCER_MANAGER").error(f"Config data keys: {list(config_data.keys())}")
                 for key, value in config_data.items():
                     try:
-                        json.dumps(value)
+                        orjson.dumps(value)
                     except TypeError:
-                        logging.getLogger("PRODUCER_MANAGER").error(f"Non-serializable key: {key}, type: {type(value)}, value: {value}")
+                        _LOG.error(f"Non-serializable key: {key}, type: {type(value)}, value: {value}")
                 return error_msg
-            
-            config_response = self.http.post(
-                f"{api_url}/configure",
-                json=config_data,
-                timeout=30
-            )
             config_response.raise_for_status()
             
             # Step 2: Start the producer
             start_response = self.http.post(
                 f"{api_url}/start",
-                json={},
+                data=orjson.dumps({}),
+                headers=_JSON_HEADERS,
                 timeout=30
             )
             start_response.raise_for_status()
             
-            # Step 3: Verify it's running
-            status_response = self.http.get(f"{api_url}/status", timeout=10)
-            status_response.raise_for_status()
-            
-            logging.getLogger("PRODUCER_MANAGER").info(f"Producer {producer_name} started successfully")
+            _LOG.info(f"Producer {producer_name} started successfully")
             return f"Producer {producer_name} started successfully"
             
         except requests.exceptions.RequestException as e:
             error_msg = f"Failed to start producer {producer_name}: {e}"
-            logging.getLogger("PRODUCER_MANAGER").error(error_msg)
+            _LOG.error(error_msg)
             return error_msg
         except Exception as e:
             error_msg = f"Failed to start producer {producer_name}: {e}"
-            logging.getLogger("PRODUCER_MANAGER").error(error_msg)
+            _LOG.error(error_msg)
             return error_msg
 
     def stop_producer(self, producer_name, producer_container):
@@ -153,13 +139,13 @@ class ProducerManager:
                 return f"Failed to stop producer {producer_name}: Container IP not found"
             
             api_url = f"http://{container_ip}:5000"
-            response = self.http.post(f"{api_url}/stop", json={}, timeout=30)
+            response = self.http.post(f"{api_url}/stop", data=orjson.dumps({}), headers=_JSON_HEADERS, timeout=30)
             response.raise_for_status()
             
             return f"Producer {producer_name} stopped successfully"
         except requests.exceptions.RequestException as e:
             error_msg = f"Failed to stop producer {producer_name}: {e}"
-            logging.getLogger("PRODUCER_MANAGER").error(error_msg)
+            _LOG.error(error_msg)
             return error_msg
 
     def get_producer_status(self, producer_name, producer_container):
@@ -195,20 +181,19 @@ class ProducerManager:
             return f"Producer {producer_name} configuration updated successfully"
         except requests.exceptions.RequestException as e:
             error_msg = f"Failed to update producer {producer_name}: {e}"
-            logging.getLogger("PRODUCER_MANAGER").error(error_msg)
+            _LOG.error(error_msg)
             return error_msg
 
     def _build_config_data(self, vehicle_config, vehicle_name):
         """Build configuration data for HTTP API"""
-        # Convert all OmegaConf objects to JSON serializable Python objects
-        vehicle_config = self._convert_to_json_serializable(vehicle_config)
-        probe_metrics = self._convert_to_json_serializable(self.probe_metrics)
-        attack_config = self._convert_to_json_serializable(self.attack_config)
+        # vehicle_config, probe metrics and attack config are already plain Python containers
+        probe_metrics = self._probe_metrics
+        attack_config = self._attack_config
         
         # Debug logging to identify problematic values
-        logging.getLogger("PRODUCER_MANAGER").debug(f"Vehicle config type: {type(vehicle_config)}")
-        logging.getLogger("PRODUCER_MANAGER").debug(f"Probe metrics type: {type(probe_metrics)}")
-        logging.getLogger("PRODUCER_MANAGER").debug(f"Attack config type: {type(attack_config)}")
+        _LOG.debug("Vehicle config type: %s", type(vehicle_config))
+        _LOG.debug("Probe metrics type: %s", type(probe_metrics))
+        _LOG.debug("Attack config type: %s", type(attack_config))
         
         config_data = {
             'vehicle_name': vehicle_name,
@@ -247,32 +232,40 @@ class ProducerManager:
             'diagnostics_classes': vehicle_config.get('diagnostics_classes', list(range(0, 15)))
         }
         
-        # Final conversion to ensure everything is JSON serializable
-        config_data = self._convert_to_json_serializable(config_data)
-        
         return config_data
 
     def stop_all_producers(self):
         """Stop all producers using HTTP API"""
-        results = []
-        for producer_name in self.producers.keys():
-            result = self.stop_producer(producer_name, self.producers[producer_name])
-            results.append(result)
+        if not self.producers:
+            return "All producers stopped!", []
+        with ThreadPoolExecutor(max_workers=len(self.producers)) as pool:
+            futures = {
+                pool.submit(self.stop_producer, producer_name, producer_container): producer_name
+                for producer_name, producer_container in self.producers.items()
+            }
+            results = [future.result() for future in as_completed(futures)]
         return "All producers stopped!", results
 
     def get_all_producer_statuses(self):
         """Get status of all producers"""
         statuses = {}
-        for producer_name, producer_container in self.producers.items():
-            status = self.get_producer_status(producer_name, producer_container)
-            statuses[producer_name] = status
+        if not self.producers:
+            return statuses
+        with ThreadPoolExecutor(max_workers=len(self.producers)) as pool:
+            futures = {
+                pool.submit(self.get_producer_status, producer_name, producer_container): producer_name
+                for producer_name, producer_container in self.producers.items()
+            }
+            for future in as_completed(futures):
+                statuses[futures[future]] = future.result()
         return statuses
 
     def _wait_for_health(self, api_url, overall_timeout_seconds=60, poll_interval_seconds=2):
         """Poll the producer /health endpoint until healthy or timeout.
+        Polling starts at 100 ms and backs off exponentially up to poll_interval_seconds.
         Returns True if healthy, False otherwise.
         """
-        logger = logging.getLogger("PRODUCER_MANAGER")
+        delay = 0.1
         deadline = time.time() + overall_timeout_seconds
         while time.time() < deadline:
             try:
@@ -283,16 +276,17 @@ class ProducerManager:
                         data = resp.json()
                         # Producer health has keys like 'running' or 'config_loaded' or 'vehicle'
                         if isinstance(data, dict) and ("running" in data or "config_loaded" in data or "vehicle" in data):
-                            logger.info(f"Health check passed for {api_url}: {data}")
+                            _LOG.info(f"Health check passed for {api_url}: {data}")
                             return True
                         else:
-                            logger.debug(f"Health check response doesn't look like producer API: {data}")
+                            _LOG.debug("Health check response doesn't look like producer API: %s", data)
                     except Exception as e:
-                        logger.debug(f"Failed to parse health response from {api_url}: {e}")
+                        _LOG.debug("Failed to parse health response from %s: %s", api_url, e)
                 else:
-                    logger.debug(f"Health check failed with status {resp.status_code} for {api_url}")
+                    _LOG.debug("Health check failed with status %s for %s", resp.status_code, api_url)
             except requests.exceptions.RequestException as e:
-                logger.debug(f"Health check request failed for {api_url}: {e}")
-            time.sleep(poll_interval_seconds)
-        logger.error(f"Health check timed out or not producer API for {api_url}")
+                _LOG.debug("Health check request failed for %s: %s", api_url, e)
+            time.sleep(delay)
+            delay = min(delay * 1.5, poll_interval_seconds)
+        _LOG.error(f"Health check timed out or not producer API for {api_url}")
         return False
\ No newline at end of file
@@ -0,0 +1,23 @@
+from omegaconf import OmegaConf
+
+
+def _resolved(node):
+    """Return node as a plain container, resolving interpolations against its original tree."""
+    if OmegaConf.is_config(node):
+        return OmegaConf.to_container(node, resolve=True)
+    return node
+
+
+def parse_vehicle_entry(vehicle, default_config):
+    """Split a cfg.vehicles entry into its name and its configuration.
+    Entries are either a plain vehicle name or a single-key mapping {name: overrides};
+    the overrides are deep-merged on top of default_config and the result is returned
+    as a plain, resolved Python dict.
+    """
+    if isinstance(vehicle, str):
+        vehicle_name, overrides = vehicle, {}
+    else:
+        vehicle_name, overrides = next(iter(vehicle.items()))
+    # Resolve both sides first: the merge result is a new root, so ${...} would not find cfg
+    vehicle_config = OmegaConf.merge(_resolved(default_config), _resolved(overrides))
+    return vehicle_name, OmegaConf.to_container(vehicle_config, resolve=True)